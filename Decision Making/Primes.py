@@ -1,12 +1,6 @@
-x = int(input("Enter a number: "))
+from sieve import iter_primes
 
-sqrt = int(x ** (1/2))
+x = int(input("Enter a number: "))
 
-for i in range(2, (x + 1)):
-    is_prime = True
-    for y in range(2, (int(i ** (1/2)) + 1)):
-        if i % y == 0:
-            is_prime = False
-            break
-    if is_prime == True:    
-        print(i)
+for i in iter_primes(x):
+    print(i)
@@ -0,0 +1,218 @@
+import math
+import time
+from collections import Counter, OrderedDict
+
+from primality import SMALL_PRIMES, is_prime
+
+# Factorials of multiples of this step are cached, so a query only multiplies in the numbers past the nearest
+# checkpoint below it.
+CHECKPOINT_STEP = 10_000
+
+# Cached checkpoints are dropped, least recently used first, once together they take more than this many bytes.
+CHECKPOINT_CACHE_BYTES = 64 << 20
+
+_checkpoints = OrderedDict()
+_checkpoint_bytes = 0
+
+
+def range_product(low, high):
+    """Returns the product of every integer from low to high inclusive, or 1 if the range is empty. The range
+    is split in half recursively so that big numbers are only multiplied by others of similar size, which is
+    much faster than multiplying one term at a time. The recursion depth is only about log2(high - low)."""
+    if high < low:
+        return 1
+    if high - low < 8:
+        product = low
+        for i in range(low + 1, high + 1):
+            product *= i
+        return product
+    mid = (low + high) // 2
+    return range_product(low, mid) * range_product(mid + 1, high)
+
+
+def _checkpoint_factorial(checkpoint):
+    """Returns the factorial of checkpoint * CHECKPOINT_STEP. It is built from the highest cached checkpoint
+    below it, so stepping up through the checkpoints only multiplies in each new range once."""
+    global _checkpoint_bytes
+    if checkpoint in _checkpoints:
+        _checkpoints.move_to_end(checkpoint)
+        return _checkpoints[checkpoint]
+
+    below = max((cached for cached in _checkpoints if cached < checkpoint), default=0)
+    if below:
+        _checkpoints.move_to_end(below)
+        value = _checkpoints[below] * range_product(below * CHECKPOINT_STEP + 1, checkpoint * CHECKPOINT_STEP)
+    else:
+        value = range_product(2, checkpoint * CHECKPOINT_STEP)
+
+    size = (value.bit_length() + 7) // 8
+    if size <= CHECKPOINT_CACHE_BYTES:
+        _checkpoints[checkpoint] = value
+        _checkpoint_bytes += size
+        while _checkpoint_bytes > CHECKPOINT_CACHE_BYTES:
+            _, dropped = _checkpoints.popitem(last=False)
+            _checkpoint_bytes -= (dropped.bit_length() + 7) // 8
+    return value
+
+
+def factorial(n):
+    """Returns n!. The factorial of the nearest cached checkpoint below n is reused, so queries for nearby
+    values of n only pay for the few numbers past it."""
+    if n < 0:
+        raise ValueError("n must not be negative")
+    checkpoint = n // CHECKPOINT_STEP
+    if checkpoint == 0:
+        return range_product(2, n)
+    return _checkpoint_factorial(checkpoint) * range_product(checkpoint * CHECKPOINT_STEP + 1, n)
+
+
+def factorial_mod(n, modulus):
+    """Returns n! mod modulus without building the full factorial."""
+    if n < 0:
+        raise ValueError("n must not be negative")
+    if modulus < 1:
+        raise ValueError("modulus must be positive")
+    # modulus itself is one of the factors, so the product is a multiple of it.
+    if n >= modulus:
+        return 0
+    result = 1 % modulus
+    for i in range(2, n + 1):
+        result = result * i % modulus
+    return result
+
+
+def binomial(n, k):
+    """Returns the binomial coefficient n choose k."""
+    if k < 0 or k > n:
+        return 0
+    k = min(k, n - k)
+    return range_product(n - k + 1, n) // factorial(k)
+
+
+def _binomial_mod_prime(n, k, p):
+    """Returns n choose k mod the prime p, for n and k below p."""
+    if k > n:
+        return 0
+    numerator = factorial_mod(n, p)
+    denominator = factorial_mod(k, p) * factorial_mod(n - k, p) % p
+    return numerator * pow(denominator, -1, p) % p
+
+
+def _binomial_mod_lucas(n, k, p):
+    """Returns n choose k mod the prime p using Lucas's theorem, which splits n and k into base-p digits so
+    no factorial above p is ever needed."""
+    result = 1
+    while n or k:
+        result = result * _binomial_mod_prime(n % p, k % p, p) % p
+        if result == 0:
+            return 0
+        n //= p
+        k //= p
+    return result
+
+
+def _pollard_rho(n):
+    """Returns a nontrivial factor of the odd composite n."""
+    for c in range(1, n):
+        x = y = 2
+        factor = 1
+        while factor == 1:
+            x = (x * x + c) % n
+            y = (y * y + c) % n
+            y = (y * y + c) % n
+            factor = math.gcd(abs(x - y), n)
+        if factor != n:
+            return factor
+
+
+def _prime_factors(n):
+    """Returns a Counter mapping each prime factor of n to its exponent."""
+    factors = Counter()
+    for p in SMALL_PRIMES:
+        while n % p == 0:
+            factors[p] += 1
+            n //= p
+    # Whatever is left has no factor below 1000, so split it with Pollard's rho.
+    remaining = [n] if n > 1 else []
+    while remaining:
+        m = remaining.pop()
+        if is_prime(m):
+            factors[m] += 1
+        else:
+            factor = _pollard_rho(m)
+            remaining += [factor, m // factor]
+    return factors
+
+
+def _unit_factorial_mod(n, p, prime_power):
+    """Returns n! with every factor of p removed, mod prime_power, a power of p."""
+    # By the generalised Wilson theorem the numbers below prime_power that p does not divide multiply to -1,
+    # except for powers of 2 from 8 up, where they multiply to 1. So each full cycle is a sign.
+    cycle = 1 if p == 2 and prime_power >= 8 else prime_power - 1
+    result = 1 % prime_power
+    while n > 1:
+        if n // prime_power % 2:
+            result = result * cycle % prime_power
+        for i in range(2, n % prime_power + 1):
+            if i % p:
+                result = result * i % prime_power
+        n //= p
+    return result
+
+
+def _binomial_mod_prime_power(n, k, p, exponent):
+    """Returns n choose k mod p ** exponent."""
+    prime_power = p ** exponent
+    # Legendre's formula gives the power of p dividing n choose k.
+    p_count = 0
+    a, b, c = n, k, n - k
+    while a:
+        a, b, c = a // p, b // p, c // p
+        p_count += a - b - c
+    if p_count >= exponent:
+        return 0
+    numerator = _unit_factorial_mod(n, p, prime_power)
+    denominator = _unit_factorial_mod(k, p, prime_power) * _unit_factorial_mod(n - k, p, prime_power)
+    return numerator * pow(denominator, -1, prime_power) * p ** p_count % prime_power
+
+
+def binomial_mod(n, k, modulus):
+    """Returns n choose k mod modulus without building the full binomial coefficient. For a prime modulus
+    Lucas's theorem is used. Otherwise the modulus is factored, the coefficient is found mod each prime power
+    factor, and the results are combined with the Chinese remainder theorem. The work for a prime power
+    factor q grows with min(n, q), so very large prime power factors are slow."""
+    if modulus < 1:
+        raise ValueError("modulus must be positive")
+    if k < 0 or k > n:
+        return 0
+    if modulus == 1:
+        return 0
+    if is_prime(modulus):
+        return _binomial_mod_lucas(n, k, modulus)
+
+    result = 0
+    for p, exponent in _prime_factors(modulus).items():
+        prime_power = p ** exponent
+        if exponent == 1:
+            residue = _binomial_mod_lucas(n, k, p)
+        else:
+            residue = _binomial_mod_prime_power(n, k, p, exponent)
+        rest = modulus // prime_power
+        result += residue * rest * pow(rest, -1, prime_power)
+    return result % modulus
+
+
+def main():
+    """Times factorials of increasing size, and a follow-up query that reuses a checkpoint."""
+    for n in (10 ** 4, 10 ** 5, 10 ** 6):
+        start = time.perf_counter()
+        factorial(n)
+        print(f"{n}! took {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    factorial(10 ** 6 + 500)
+    print(f"{10 ** 6 + 500}! from the cached checkpoint took {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import functools
+import time
+
+# Pisano periods are only cached for moduli up to this size, since finding one takes up to 6 * m steps.
+PISANO_LIMIT = 10 ** 6
+
+
+def fibonacci_pair(n, modulus=None):
+    """Returns (F(n), F(n + 1)) using fast doubling, which takes O(log n) multiplications. The results are
+    reduced modulo modulus when one is given."""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        # F(2k) = F(k) * (2F(k + 1) - F(k)) and F(2k + 1) = F(k)^2 + F(k + 1)^2.
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if bit == '1':
+            c, d = d, c + d
+        if modulus is not None:
+            c %= modulus
+            d %= modulus
+        a, b = c, d
+    return a, b
+
+
+def fibonacci(n):
+    """Returns F(n), the nth Fibonacci number, where F(0) = 0 and F(1) = 1."""
+    if n < 0:
+        raise ValueError("n must not be negative")
+    return fibonacci_pair(n)[0]
+
+
+@functools.lru_cache(maxsize=256)
+def pisano_period(modulus):
+    """Returns the period with which the Fibonacci sequence repeats modulo modulus."""
+    if modulus == 1:
+        return 1
+    previous, current = 0, 1
+    for i in range(1, 6 * modulus + 1):
+        previous, current = current, (previous + current) % modulus
+        if previous == 0 and current == 1:
+            return i
+    raise ArithmeticError(f"no Pisano period found for {modulus}")
+
+
+def fibonacci_mod(n, modulus):
+    """Returns F(n) mod modulus. For small moduli n is first reduced by the cached Pisano period."""
+    if n < 0:
+        raise ValueError("n must not be negative")
+    if modulus < 1:
+        raise ValueError("modulus must be positive")
+    if modulus <= PISANO_LIMIT:
+        n %= pisano_period(modulus)
+    return fibonacci_pair(n, modulus)[0]
+
+
+def fibonacci_sequence(term_count):
+    """Yields the first term_count Fibonacci numbers, starting from F(0), in O(term_count) additions."""
+    a, b = 0, 1
+    for _ in range(term_count):
+        yield a
+        a, b = b, a + b
+
+
+def _recursive_fibonacci(term_input):
+    """The exponential-time version from FibonacciRecursive.py, kept as the benchmark baseline."""
+    if term_input == 0:
+        return 0
+    elif term_input == 1:
+        return 1
+    else:
+        return _recursive_fibonacci(term_input - 2) + _recursive_fibonacci(term_input - 1)
+
+
+def main(term_count=27):
+    """Compares the recursive version with the generator for the first term_count terms, then times F(n) for
+    a few large n."""
+    start = time.perf_counter()
+    recursive_terms = [_recursive_fibonacci(i) for i in range(term_count)]
+    recursive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    streamed_terms = list(fibonacci_sequence(term_count))
+    streamed = time.perf_counter() - start
+
+    assert recursive_terms == streamed_terms
+    print(f"First {term_count} terms: recursive {recursive:.4f}s, generator {streamed:.6f}s "
+          f"({recursive / streamed:.0f}x faster)")
+
+    for n in (10 ** 5, 10 ** 6, 10 ** 7):
+        start = time.perf_counter()
+        fibonacci(n)
+        print(f"F({n}) by fast doubling: {time.perf_counter() - start:.4f}s")
+
+    start = time.perf_counter()
+    fibonacci_mod(10 ** 18, 10 ** 6)
+    print(f"F(10^18) mod 10^6: {time.perf_counter() - start:.4f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import itertools
+import math
+
+from sieve import count_primes, primes_up_to, sieve_segment
+
+SMALL_PRIMES = primes_up_to(1000)
+
+# Any number sharing a factor with this product has a prime factor below 1000, so one gcd rules it out.
+_SMALL_PRIME_PRODUCT = math.prod(SMALL_PRIMES)
+_SMALL_PRIME_SET = frozenset(SMALL_PRIMES)
+
+# Jim Sinclair's seven bases make Miller-Rabin deterministic for every n below 2^64. Above that, testing
+# against every prime up to 41 is deterministic for n below 3.3 * 10^24.
+MILLER_RABIN_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+# The prime table never grows past this limit, about 50MB of flags at one byte per odd number. Larger
+# numbers are tested with Miller-Rabin or counted with the segmented sieve instead.
+SIEVE_LIMIT = 10 ** 8
+
+# Number of flags counted together when searching for the nth prime.
+_BLOCK = 1 << 16
+
+
+def _miller_rabin(n):
+    """Returns True if odd n, which has no factors below 1000, is a strong probable prime to every base."""
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    for base in MILLER_RABIN_BASES_64 if n < 1 << 64 else MILLER_RABIN_BASES:
+        base %= n
+        if base == 0:
+            continue
+        x = pow(base, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_prime(n):
+    """Returns True if n is prime. Candidates are first checked against the primes below 1000, then with
+    Miller-Rabin, which is deterministic for n below 3.3 * 10^24 and a very strong probable prime test above."""
+    if n < 2:
+        return False
+    if n <= SMALL_PRIMES[-1]:
+        return n in _SMALL_PRIME_SET
+    if math.gcd(n, _SMALL_PRIME_PRODUCT) != 1:
+        return False
+    if n < 1000 * 1000:
+        return True
+    return _miller_rabin(n)
+
+
+class PrimeTable:
+    """A cached sieve that grows on demand to answer prime-count (pi(n)), nth-prime and lookup queries. It
+    never grows past max_limit."""
+
+    def __init__(self, limit=1000, max_limit=SIEVE_LIMIT):
+        self._limit = 0
+        self._max_limit = max_limit
+        self._flags = bytearray()
+        self.extend(limit)
+
+    def get_limit(self):
+        """Returns the largest number the table currently covers."""
+        return self._limit
+
+    def get_max_limit(self):
+        """Returns the largest number the table is allowed to grow to."""
+        return self._max_limit
+
+    def extend(self, limit):
+        """Grows the table to cover every number up to limit, at least doubling it to keep growth cheap.
+        Only the newly covered numbers are sieved. Raises ValueError if limit is beyond the maximum."""
+        if limit <= self._limit:
+            return
+        if limit > self._max_limit:
+            raise ValueError(f"the prime table cannot grow past {self._max_limit}")
+        new_limit = min(max(limit, 2 * self._limit), self._max_limit)
+        # The first odd number the table does not cover yet.
+        low = 2 * len(self._flags) + 1
+        base_primes = primes_up_to(math.isqrt(new_limit) + 1)[1:]
+        self._flags += sieve_segment(low, new_limit + 1, base_primes)
+        self._limit = new_limit
+
+    def is_prime(self, n):
+        """Returns True if n is prime, growing the table if n is beyond it. Numbers past the table's maximum
+        are tested with Miller-Rabin."""
+        if n < 3:
+            return n == 2
+        if n % 2 == 0:
+            return False
+        if n > self._max_limit:
+            return is_prime(n)
+        self.extend(n)
+        return self._flags[n // 2] == 1
+
+    def prime_count(self, n):
+        """Returns pi(n), the number of primes up to and including n. Numbers past the table's maximum are
+        counted with the segmented sieve, which does not keep its flags."""
+        if n < 2:
+            return 0
+        if n > self._max_limit:
+            return count_primes(n)
+        self.extend(n)
+        return 1 + self._flags.count(1, 0, (n + 1) // 2)
+
+    def nth_prime(self, n):
+        """Returns the nth prime, counting 2 as the first. Raises ValueError if the nth prime is beyond the
+        table's maximum."""
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        if n == 1:
+            return 2
+
+        # Grow the table until it holds at least n primes.
+        while self.prime_count(self._limit) < n:
+            if self._limit >= self._max_limit:
+                raise ValueError(f"the {n}th prime is beyond {self._max_limit}")
+            self.extend(min(2 * self._limit, self._max_limit))
+
+        # Skip whole blocks of flags, then find the prime within the last block.
+        remaining = n - 1
+        start = 0
+        while True:
+            in_block = self._flags.count(1, start, start + _BLOCK)
+            if in_block >= remaining:
+                break
+            remaining -= in_block
+            start += _BLOCK
+        block = itertools.compress(range(start, start + _BLOCK), self._flags[start:start + _BLOCK])
+        return 2 * next(itertools.islice(block, remaining - 1, None)) + 1
+
+
+prime_table = PrimeTable()
+
+
+def is_prime_batch(candidates):
+    """Returns a list saying whether each candidate is prime. Candidates up to the prime table's maximum are
+    looked up in the shared prime table, which is grown once to cover them, and larger ones use is_prime."""
+    candidates = list(candidates)
+    max_limit = prime_table.get_max_limit()
+    sieve_limit = max((n for n in candidates if n <= max_limit), default=0)
+    prime_table.extend(sieve_limit)
+    lookup = prime_table.is_prime
+    return [lookup(n) if n <= sieve_limit else is_prime(n) for n in candidates]
+
+
+def prime_count(n):
+    """Returns pi(n), the number of primes up to and including n."""
+    return prime_table.prime_count(n)
+
+
+def nth_prime(n):
+    """Returns the nth prime, counting 2 as the first."""
+    return prime_table.nth_prime(n)
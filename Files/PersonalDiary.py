@@ -1,27 +1,161 @@
+import gzip
+import json
 import os
 import datetime
+import re
+import shutil
 import time
 
+# Matches the timestamp line written before each timestamped entry, capturing its date.
+TIMESTAMP_LINE = re.compile(r"^\[(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}:\d{2}\]$", re.MULTILINE)
+
 class DiaryApp:
     def __init__(self, diary_file="my_diary.txt"):
-        """Initialize the diary application with the specified diary file."""
+        """Initialize the diary application with the specified diary file.
+
+        Entries are stored in one segment file per month, named after the diary file, and segments from
+        earlier months are compressed. A manifest file lists every segment and the dates it covers.
+        """
         self.diary_file = diary_file
+        self.segment_prefix = os.path.splitext(diary_file)[0]
+        self.manifest_file = f"{self.segment_prefix}_manifest.json"
+        self.segments = self.load_manifest()
         self.ensure_diary_exists()
     
+    def load_manifest(self):
+        """Load the list of segments from the manifest.
+
+        If there is no manifest, or it cannot be read, the list is rebuilt from the diary files on disk so
+        that no segment is left out when the manifest is next saved.
+        """
+        try:
+            if os.path.exists(self.manifest_file):
+                with open(self.manifest_file, 'r') as f:
+                    return json.load(f)["segments"]
+            return self.scan_segments()
+        except (json.JSONDecodeError, KeyError, TypeError):
+            print("Error: Diary manifest is corrupted. Rebuilding it from the diary files.")
+        except PermissionError:
+            print("Error: You don't have permission to read the diary manifest. Rebuilding it from the diary files.")
+        except Exception as e:
+            print(f"Unexpected error loading diary manifest: {e}. Rebuilding it from the diary files.")
+        segments = self.scan_segments()
+        self.segments = segments
+        self.save_manifest()
+        return segments
+    
+    @staticmethod
+    def month_segment(file, date, compressed):
+        """Return the manifest entry for the segment file holding the entries of date's month."""
+        first_day = date.replace(day=1)
+        last_day = (first_day + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+        return {"file": file, "period": first_day.strftime("%Y-%m"), "start": first_day.isoformat(),
+                "end": last_day.isoformat(), "compressed": compressed}
+    
+    def legacy_segment(self, file, compressed):
+        """Return the manifest entry for a diary file from before segments were used.
+
+        Its date range is taken from the timestamps of its entries, or from the date the file was last
+        modified if none of its entries have timestamps.
+        """
+        segment = {"file": file, "period": None, "start": None, "end": None, "compressed": compressed}
+        with self.open_segment(segment, 'r') as f:
+            dates = TIMESTAMP_LINE.findall(f.read())
+        if dates:
+            segment["start"], segment["end"] = min(dates), max(dates)
+        else:
+            modified = datetime.date.fromtimestamp(os.path.getmtime(file)).isoformat()
+            segment["start"] = segment["end"] = modified
+        return segment
+    
+    def scan_segments(self):
+        """Build the list of segments from the diary files on disk, oldest first."""
+        segments = []
+        for file, compressed in ((self.diary_file, False), (self.diary_file + ".gz", True)):
+            if os.path.exists(file):
+                segments.append(self.legacy_segment(file, compressed))
+        
+        directory = os.path.dirname(self.segment_prefix)
+        pattern = re.compile(re.escape(os.path.basename(self.segment_prefix)) + r"_(\d{4}-\d{2})\.txt(\.gz)?$")
+        for name in sorted(os.listdir(directory or ".")):
+            match = pattern.match(name)
+            if match:
+                month = datetime.datetime.strptime(match.group(1), "%Y-%m").date()
+                segments.append(self.month_segment(os.path.join(directory, name), month, bool(match.group(2))))
+        return segments
+    
+    def save_manifest(self):
+        """Save the list of segments, replacing the old manifest in one step so it is never half written."""
+        try:
+            temporary_file = f"{self.manifest_file}.tmp"
+            with open(temporary_file, 'w') as f:
+                json.dump({"segments": self.segments}, f, indent=4)
+            os.replace(temporary_file, self.manifest_file)
+        except PermissionError:
+            print("Error: You don't have permission to write the diary manifest.")
+        except Exception as e:
+            print(f"Unexpected error saving diary manifest: {e}")
+    
     def ensure_diary_exists(self):
-        """Make sure the diary file exists, create it if it doesn't."""
+        """Make sure the diary manifest exists, create it if it doesn't.
+
+        A diary file from before segments were used is kept as the first segment, covering the dates of
+        its entries.
+        """
         try:
-            if not os.path.exists(self.diary_file):
-                with open(self.diary_file, 'w') as f:
-                    f.write("=== My Personal Diary ===\n\n")
-                print(f"Created new diary file: {self.diary_file}")
+            if not os.path.exists(self.manifest_file):
+                self.save_manifest()
+                print(f"Created new diary manifest: {self.manifest_file}")
         except PermissionError:
             print("Error: You don't have permission to create a diary file in this location.")
         except Exception as e:
             print(f"Unexpected error creating diary file: {e}")
     
+    @staticmethod
+    def open_segment(segment, mode):
+        """Open a segment file as text, reading compressed segments transparently."""
+        if segment["compressed"]:
+            return gzip.open(segment["file"], mode + 't')
+        return open(segment["file"], mode)
+    
+    def compress_segment(self, segment):
+        """Compress a segment file with gzip and record the new file name in the manifest."""
+        compressed_file = segment["file"] + ".gz"
+        with open(segment["file"], 'rb') as source, gzip.open(compressed_file, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(segment["file"])
+        segment["file"] = compressed_file
+        segment["compressed"] = True
+    
+    def segment_for(self, date):
+        """Return the segment for the month of date, starting a new segment if there isn't one yet.
+
+        Starting a new segment compresses every segment from an earlier month.
+        """
+        period = date.strftime("%Y-%m")
+        for segment in reversed(self.segments):
+            if segment["period"] == period:
+                return segment
+        
+        for segment in self.segments:
+            if not segment["compressed"] and os.path.exists(segment["file"]):
+                self.compress_segment(segment)
+        
+        segment = self.month_segment(f"{self.segment_prefix}_{period}.txt", date, False)
+        self.segments.append(segment)
+        self.save_manifest()
+        return segment
+    
+    def segments_between(self, start_date=None, end_date=None):
+        """Return the segments whose dates overlap start_date to end_date, in the order they were written."""
+        start = start_date.isoformat() if start_date else None
+        end = end_date.isoformat() if end_date else None
+        return [segment for segment in self.segments
+                if (start is None or segment["end"] is None or segment["end"] >= start)
+                and (end is None or segment["start"] is None or segment["start"] <= end)]
+    
     def add_entry(self, add_timestamp=True):
-        """Add a new entry to the diary with optional timestamp."""
+        """Add a new entry to the current month's segment with optional timestamp."""
         try:
             print("\n=== New Diary Entry ===")
             print("(Type your entry and press Enter twice to finish)")
@@ -39,9 +173,10 @@ class DiaryApp:
                 print("Empty entry not saved.")
                 return
             
-            with open(self.diary_file, 'a') as f:
+            now = datetime.datetime.now()
+            with self.open_segment(self.segment_for(now.date()), 'a') as f:
                 if add_timestamp:
-                    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
                     f.write(f"\n\n[{timestamp}]\n")
                 else:
                     f.write("\n\n")
@@ -56,21 +191,23 @@ class DiaryApp:
         except Exception as e:
             print(f"Unexpected error: {e}")
     
-    def view_entries(self):
-        """View all previous diary entries."""
+    def view_entries(self, start_date=None, end_date=None):
+        """View previous diary entries, optionally only from the segments overlapping start_date to end_date."""
         try:
-            if not os.path.exists(self.diary_file):
-                print("No diary entries found.")
-                return
+            contents = []
+            for segment in self.segments_between(start_date, end_date):
+                if os.path.exists(segment["file"]):
+                    with self.open_segment(segment, 'r') as f:
+                        contents.append(f.read())
             
-            with open(self.diary_file, 'r') as f:
-                content = f.read()
+            content = "".join(contents).replace("=== My Personal Diary ===", "", 1)
             
-            if content.strip() == "=== My Personal Diary ===":
+            if not content.strip():
                 print("No entries yet. Add your first entry!")
                 return
                 
             print("\n=== Your Diary Entries ===\n")
+            print("=== My Personal Diary ===")
             print(content)
             
         except PermissionError:
@@ -1,3 +1,13 @@
+import contextlib
+import io
+import queue
+import random
+import sys
+import threading
+import time
+from array import array
+
+
 class Product:
 
     products = []
@@ -25,8 +35,177 @@ def display_total_values():
         total += value
         print(f"Total inventory value is {total}")
 
-product = add_product("Doohickey", 10.99, 5)
 
-product.update_quantity(100)
+class StockLedger:
+    """Keeps product quantities and prices in compact arrays so that large batches of stock movements
+    (receipts, sales and adjustments) can be applied in a single pass."""
+
+    def __init__(self, products=None):
+        if products is None:
+            products = Product.products
+        self.products = list(products)
+        self.index = {product.name: i for i, product in enumerate(self.products)}
+        self.refresh()
+
+    def refresh(self):
+        """Reloads quantities and prices from the products, picking up any changes made outside the ledger."""
+        self.quantities = array('q', (product.quantity for product in self.products))
+        self.prices = array('d', (product.price for product in self.products))
+        self.total_value = self.compute_total_value()
+
+    def compute_total_value(self):
+        """Returns the value of all stock held in the ledger."""
+        return sum(map(lambda price, quantity: price * quantity, self.prices, self.quantities))
+
+    def apply_moves(self, moves):
+        """Applies (product name, quantity change) moves in order. Positive changes are receipts, negative
+        changes are sales or adjustments. A move that would make stock negative, or that names an unknown
+        product, is rejected. Returns the new quantity for each accepted move and None for each rejected one.
+        Raises TypeError, before any move is applied, if a quantity change is not a whole number."""
+        moves = list(moves)
+        for name, change in moves:
+            if not isinstance(change, int):
+                raise TypeError(f"quantity change for {name} must be a whole number, not {change!r}")
+
+        # Start from the products' current quantities in case they were updated since the last batch.
+        self.refresh()
+        quantities = self.quantities
+        index = self.index
+        changed = set()
+        results = []
+        append = results.append
+
+        for name, change in moves:
+            i = index.get(name)
+            if i is None:
+                append(None)
+                continue
+            new_quantity = quantities[i] + change
+            if new_quantity < 0:
+                append(None)
+                continue
+            quantities[i] = new_quantity
+            changed.add(i)
+            append(new_quantity)
+
+        # Write the final quantities back to the changed products once, rather than after every move.
+        for i in changed:
+            self.products[i].quantity = quantities[i]
+        self.total_value = self.compute_total_value()
+        return results
+
+
+class ConcurrentInventory:
+    """Allows many threads to update product quantities at once. Products are guarded by striped locks so
+    updates to different products rarely contend, and low-stock alerts are delivered on a background thread
+    so subscribers never slow down the update path."""
+
+    def __init__(self, products=None, stripes=16):
+        if products is None:
+            products = Product.products
+        self._products = {product.name: product for product in products}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._subscribers = []
+        self._alerts = queue.Queue()
+        self._alerts_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._deliver_alerts, daemon=True)
+        self._worker.start()
+
+    def _lock_for(self, name):
+        """Returns the lock stripe that guards the named product."""
+        return self._locks[hash(name) % len(self._locks)]
+
+    def add_product(self, product):
+        """Adds a product so it can be updated through the inventory."""
+        self._products[product.name] = product
+
+    def subscribe_low_stock(self, callback, threshold):
+        """Registers callback(product, quantity) to be called when a product's quantity drops below threshold."""
+        self._subscribers.append((callback, threshold))
+
+    def update_quantity(self, name, quantity_change):
+        """Atomically changes the quantity of the named product and returns the new quantity. Once the inventory
+        is closed, updates still apply but no more low-stock alerts are sent."""
+        product = self._products[name]
+        with self._lock_for(name):
+            old_quantity = product.quantity
+            product.quantity = new_quantity = old_quantity + quantity_change
+
+        for callback, threshold in self._subscribers:
+            if new_quantity < threshold <= old_quantity:
+                self._queue_alert(callback, product, new_quantity)
+        return new_quantity
+
+    def _queue_alert(self, callback, product, quantity):
+        """Queues a low-stock alert for the alert thread, unless the inventory has been closed."""
+        with self._alerts_lock:
+            if not self._closed:
+                self._alerts.put((callback, product, quantity))
+
+    def _deliver_alerts(self):
+        """Calls low-stock subscribers from the background alert thread."""
+        while True:
+            alert = self._alerts.get()
+            if alert is None:
+                self._alerts.task_done()
+                return
+            callback, product, quantity = alert
+            try:
+                callback(product, quantity)
+            except Exception as e:
+                print(f"Error in low-stock alert for {product.name}: {e}")
+            finally:
+                self._alerts.task_done()
+
+    def wait_for_alerts(self):
+        """Blocks until every queued low-stock alert has been delivered."""
+        self._alerts.join()
+
+    def close(self):
+        """Delivers any pending alerts and stops the alert thread. Closing more than once does nothing."""
+        with self._alerts_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._alerts.put(None)
+        self._worker.join()
+
+
+def benchmark_moves(move_count=1_000_000, product_count=100):
+    """Compares applying stock movements one update_quantity call at a time against a StockLedger batch."""
+    rng = random.Random(0)
+    names = [f"Product {i}" for i in range(product_count)]
+    moves = [(rng.choice(names), rng.randint(-5, 5)) for _ in range(move_count)]
+
+    registered = len(Product.products)
+    try:
+        products = [Product(name, rng.uniform(1, 100), 1000) for name in names]
+        lookup = {product.name: product for product in products}
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, change in moves:
+                lookup[name].update_quantity(change)
+        per_call = time.perf_counter() - start
+
+        products = [Product(name, rng.uniform(1, 100), 1000) for name in names]
+        start = time.perf_counter()
+        StockLedger(products).apply_moves(moves)
+        batch = time.perf_counter() - start
+    finally:
+        # Product registers every instance, so drop the synthetic ones again.
+        del Product.products[registered:]
+
+    print(f"update_quantity: {per_call:.3f}s, StockLedger.apply_moves: {batch:.3f}s "
+          f"({per_call / batch:.1f}x faster) for {move_count} moves")
+
+
+if __name__ == "__main__":
+    product = add_product("Doohickey", 10.99, 5)
+
+    product.update_quantity(100)
+
+    display_total_values()
 
-display_total_values()
\ No newline at end of file
+    if "--benchmark" in sys.argv:
+        benchmark_moves()
\ No newline at end of file
@@ -1,3 +1,9 @@
+import bisect
+import copy
+import json
+import time
+
+
 class LibraryItem:
     """Represents a library item that a patron can check out from a library."""
 
@@ -140,21 +146,231 @@ class Patron:
         self._fine_amount += amount
 
 
+class LibraryMetrics:
+    """Counts the outcomes of library operations and keeps a histogram of how long each operation takes."""
+
+    # Upper bounds of the latency histogram buckets in seconds, from 1 microsecond to 1 second. The final
+    # bucket holds everything slower.
+    LATENCY_BOUNDS = (1e-6, 2e-6, 5e-6, 1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+    def __init__(self):
+        self._outcomes = {}
+        self._latencies = {}
+        self._total_seconds = {}
+
+    def record(self, operation, outcome, seconds):
+        """Records one call of an operation, how it turned out, and how long it took."""
+        outcomes = self._outcomes.setdefault(operation, {})
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        buckets = self._latencies.setdefault(operation, [0] * (len(self.LATENCY_BOUNDS) + 1))
+        buckets[bisect.bisect_left(self.LATENCY_BOUNDS, seconds)] += 1
+        self._total_seconds[operation] = self._total_seconds.get(operation, 0.0) + seconds
+
+    def snapshot(self):
+        """Returns a copy of the metrics as a dict keyed by operation name."""
+        snapshot = {}
+        for operation, outcomes in self._outcomes.items():
+            count = sum(outcomes.values())
+            bounds = [str(bound) for bound in self.LATENCY_BOUNDS] + ["inf"]
+            snapshot[operation] = {
+                "count": count,
+                "outcomes": dict(outcomes),
+                "mean_seconds": self._total_seconds[operation] / count,
+                "latency_histogram": dict(zip(bounds, self._latencies[operation])),
+            }
+        return snapshot
+
+    def export(self, file):
+        """Writes a snapshot of the metrics to an open text file as JSON."""
+        json.dump(self.snapshot(), file, indent=2)
+
+    def reset(self):
+        """Clears all recorded metrics."""
+        self._outcomes.clear()
+        self._latencies.clear()
+        self._total_seconds.clear()
+
+
+class LibraryHistory:
+    """Records every operation on a library as an event, along with periodic snapshots of the library's state,
+    so the state on any past date can be rebuilt by replaying only the events since the nearest snapshot."""
+
+    def __init__(self, snapshot_interval=30):
+        self._snapshot_interval = snapshot_interval
+        self._events = []
+        self._snapshots = []
+        self._snapshot_dates = []
+
+    def get_snapshot_interval(self):
+        """Returns how many days pass between snapshots."""
+        return self._snapshot_interval
+
+    def get_events(self):
+        """Returns the list of recorded (date, operation, arguments) events."""
+        return self._events
+
+    def get_start_date(self):
+        """Returns the date recording started, the earliest date that can be rebuilt."""
+        return self._snapshot_dates[0]
+
+    def record(self, date, operation, args):
+        """Records that an operation was called with args on the given date. Added items and patrons are
+        copied so that later changes to them do not alter the history."""
+        if operation in ("add_library_item", "add_patron"):
+            args = copy.deepcopy(args)
+        self._events.append((date, operation, args))
+
+    def take_snapshot(self, library):
+        """Stores a copy of the library's current state, marked with the number of events recorded so far."""
+        # Holdings and members are copied together so that items and patrons still refer to each other.
+        holdings, members = copy.deepcopy((library._holdings, library._members))
+        self._snapshots.append((library._current_date, len(self._events), holdings, members))
+        self._snapshot_dates.append(library._current_date)
+
+    def library_at(self, date):
+        """Returns a new Library with the state the library had at the end of the given day."""
+        # The last snapshot taken on or before the date.
+        position = bisect.bisect_right(self._snapshot_dates, date) - 1
+        snapshot_date, event_count, holdings, members = self._snapshots[position]
+
+        library = Library()
+        library._holdings, library._members = copy.deepcopy((holdings, members))
+        library._current_date = snapshot_date
+        library._silent = True
+
+        for event_date, operation, args in self._events[event_count:]:
+            # Stop at the first event of a later day, or at the increment that ends the requested day.
+            if event_date > date or (event_date == date and operation == "increment_current_date"):
+                break
+            if operation in ("add_library_item", "add_patron"):
+                args = copy.deepcopy(args)
+            getattr(library, operation)(*args)
+
+        library._silent = False
+        return library
+
+
 class Library:
     """Represents a library that has a collection of library items which can be books, albums, or movies.
     The library can be used by patrons, but only if they are library members.."""
 
+    # The operations that are timed and counted when metrics are enabled.
+    INSTRUMENTED_OPERATIONS = ("check_out_library_item", "return_library_item", "request_library_item",
+                               "pay_fine", "increment_current_date")
+
     def __init__(self):
         self._holdings = []
         self._members = []
         self._current_date = 0
+        self._metrics = None
+        self._last_outcome = None
+        self._silent = False
+        self._history = None
+
+    def _report(self, message):
+        """Prints the outcome message of an operation and remembers it for metrics."""
+        self._last_outcome = message
+        if self._silent:
+            return None
+        return print(message)
+
+    def _record(self, operation, *args):
+        """Adds an operation to the library's history, if it keeps one."""
+        if self._history is not None:
+            self._history.record(self._current_date, operation, args)
+
+    def enable_history(self, snapshot_interval=30):
+        """Starts recording the library's operations, with a snapshot of its state every snapshot_interval
+        days, and returns the LibraryHistory they are recorded in. Past states can only be rebuilt from the
+        day recording started. Nothing is recorded or copied unless history is enabled."""
+        self._history = LibraryHistory(snapshot_interval)
+        self._history.take_snapshot(self)
+        return self._history
+
+    def disable_history(self):
+        """Stops recording the library's operations and discards the recorded history."""
+        self._history = None
+
+    def get_history(self):
+        """Returns the library's LibraryHistory, or None if history is not enabled."""
+        return self._history
+
+    def library_at(self, date):
+        """Returns a new Library with the state this library had at the end of the given day."""
+        if self._history is None:
+            raise ValueError("history is not enabled for this library")
+        start_date = self._history.get_start_date()
+        if date < start_date or date > self._current_date:
+            raise ValueError(f"date must be between {start_date} and {self._current_date}")
+        return self._history.library_at(date)
+
+    def checked_out_by_on(self, library_item_id, date):
+        """Returns the ID of the patron who had the item checked out at the end of the given day, or None."""
+        item = self.library_at(date).lookup_library_item_from_id(library_item_id)
+        if item is None:
+            return None
+        return item.get_checked_out_by()
+
+    def fine_amount_on(self, patron_id, date):
+        """Returns how much the patron owed in fines at the end of the given day, or None if they were not
+        a member yet."""
+        patron = self.library_at(date).lookup_patron_from_id(patron_id)
+        if patron is None:
+            return None
+        return patron.get_fine_amount()
+
+    def enable_metrics(self, metrics=None):
+        """Starts recording outcome counts and latencies for the library's operations, and returns the
+        LibraryMetrics they are recorded in. Operations are only wrapped while metrics are enabled, so there
+        is no overhead when they are not."""
+        self._metrics = metrics if metrics is not None else LibraryMetrics()
+        for operation in self.INSTRUMENTED_OPERATIONS:
+            setattr(self, operation, self._instrument(operation, getattr(type(self), operation).__get__(self)))
+        return self._metrics
+
+    def disable_metrics(self):
+        """Stops recording metrics and restores the uninstrumented operations."""
+        for operation in self.INSTRUMENTED_OPERATIONS:
+            self.__dict__.pop(operation, None)
+        self._metrics = None
+
+    def get_metrics(self):
+        """Returns the LibraryMetrics being recorded, or None if metrics are not enabled."""
+        return self._metrics
+
+    def _instrument(self, operation, method):
+        """Returns a version of method that records its outcome and latency."""
+        metrics = self._metrics
+
+        def instrumented(*args, **kwargs):
+            self._last_outcome = None
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                metrics.record(operation, "error", time.perf_counter() - start)
+                raise
+            elapsed = time.perf_counter() - start
+            metrics.record(operation, self._outcome_name(self._last_outcome), elapsed)
+            return result
+
+        return instrumented
+
+    @staticmethod
+    def _outcome_name(message):
+        """Turns an outcome message such as "item not found" into a metrics label such as "item_not_found"."""
+        if message is None or message.endswith("successful"):
+            return "success"
+        return message.replace(" ", "_")
 
     def add_library_item(self, item):
         """Adds an item to the library's holdings."""
+        self._record("add_library_item", item)
         return self._holdings.append(item)
 
     def add_patron(self, patron):
         """Adds a patron to the list of the library's members."""
+        self._record("add_patron", patron)
         return self._members.append(patron)
 
     def lookup_library_item_from_id(self, library_item_id):
@@ -179,6 +395,7 @@ class Library:
 
     def check_out_library_item(self, patron_id, library_item_id):
         """Checks out a particular library item for a particular patron."""
+        self._record("check_out_library_item", patron_id, library_item_id)
 
         # Initialize a patron and item variable for ease of use.
         patron = self.lookup_patron_from_id(patron_id)
@@ -186,19 +403,19 @@ class Library:
 
         # If the patron entered is not in the member list, return an error.
         if patron is None:
-            return print("patron not found")
+            return self._report("patron not found")
 
         # If the item entered is not in the library's item list, return an error.
         if item is None:
-            return print("item not found")
+            return self._report("item not found")
 
         # If the item entered is already checked out, return an error.
         if item.get_location() == "CHECKED_OUT":
-            return print("item already checked out")
+            return self._report("item already checked out")
 
         # If the item is already requested by someone, return an error.
         if item.get_requested_by() is not None and item.get_requested_by() != patron:
-            return print("item on hold by other patron")
+            return self._report("item on hold by other patron")
 
         # Update the item to specify which patron checked it out.
         item.set_checked_out_by(patron_id)
@@ -214,22 +431,25 @@ class Library:
         # Adds the item to the list of items the patron has checked out.
         patron.add_library_item(item)
 
-        return print("check out successful")
+        return self._report("check out successful")
 
     def return_library_item(self, library_item_id):
         """Initiates the return of a particular item to the library."""
+        self._record("return_library_item", library_item_id)
 
-        # Initialize a patron and item variable for ease of use.
+        # Initialize an item variable for ease of use.
         item = self.lookup_library_item_from_id(library_item_id)
-        patron = self.lookup_patron_from_id(item.get_checked_out_by())
 
         # If the item does not exist in the library's catalogue, return an error.
         if item is None:
-            return print("item not found")
+            return self._report("item not found")
+
+        # Look up the patron only once the item is known to exist.
+        patron = self.lookup_patron_from_id(item.get_checked_out_by())
 
         # If the item is not checked out, return an error.
         if item.get_location() != "CHECKED_OUT":
-            return print("item already in library")
+            return self._report("item already in library")
 
         # Remove the item from the patron's list of checked out items.
         patron.remove_library_item(item)
@@ -244,10 +464,11 @@ class Library:
         # Set the check-out status of the item to none.
         item.set_checked_out_by(None)
 
-        return print("return successful")
+        return self._report("return successful")
 
     def request_library_item(self, patron_id, library_item_id):
         """Adds a request/hold on a particular library item for a particular patron."""
+        self._record("request_library_item", patron_id, library_item_id)
 
         # Initialize a patron and item variable for ease of use.
         patron = self.lookup_patron_from_id(patron_id)
@@ -255,15 +476,15 @@ class Library:
 
         # If the patron does not exist in the list of the library's members, return an error.
         if patron is None:
-            return print("patron not found")
+            return self._report("patron not found")
 
         # If the item does not exist in the library's catalogue, return an error.
         if item is None:
-            return print("item not found")
+            return self._report("item not found")
 
         # If the item was already requested by another patron, return an error.
         if item.get_requested_by() is not None:
-            return print("item already on hold")
+            return self._report("item already on hold")
 
         # Otherwise, set the item's requested by field to the patron.
         item.set_requested_by(patron)
@@ -272,25 +493,27 @@ class Library:
         if item.get_location() == "ON_SHELF":
             item.set_location("ON_HOLD_SHELF")
 
-        return print("request successful")
+        return self._report("request successful")
 
     def pay_fine(self, patron_id, amount):
         """Reduces the amount of fines the patron owes."""
+        self._record("pay_fine", patron_id, amount)
 
         # Initialize a patron variable for ease of use.
         patron = self.lookup_patron_from_id(patron_id)
 
         # If the patron is not in the list of library members, return an error.
         if patron is None:
-            return print("patron not found")
+            return self._report("patron not found")
 
         # Otherwise, reduce the patron's fine by the amount entered and return a confirmation.
         patron.amend_fine(-amount)
 
-        return print("payment successful")
+        return self._report("payment successful")
 
     def increment_current_date(self):
         """Increases the current date for the library."""
+        self._record("increment_current_date")
 
         # Increments the library's current day by 1.
         self._current_date += 1
@@ -306,6 +529,10 @@ class Library:
                 if self._current_date > due_date:
                     patron.amend_fine(0.10)
 
+        # Take a snapshot at the start of every snapshot interval so past states can be rebuilt quickly.
+        if self._history is not None and self._current_date % self._history.get_snapshot_interval() == 0:
+            self._history.take_snapshot(self)
+
 
 def main():
     """The main function that is triggered when the file is run as a script."""
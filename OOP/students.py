@@ -1,24 +1,142 @@
+import heapq
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+
+
 class Student:
     def __init__(self, name, age, grades):
         self.name = name
         self.age = age
         self.grades = grades
 
+    def average(self):
+        """Returns the student's average grade, or None if they have no grades yet."""
+        if not self.grades:
+            return None
+        return sum(self.grades) / len(self.grades)
+
     def info_display(self):
-        average = sum(self.grades) / len(self.grades)
-        
+        average = self.average()
+
+        if average is None:
+            print(f"The student's name is {self.name}, their age is {self.age}, and they have no grades yet.")
+            return
+
         print(f"The student's name is {self.name}, their age is {self.age}, and their grades are {self.grades}. Their average is {average}.")
 
+
+class StudentRegistry:
+    """Stores students column by column in compact arrays. Each student's average is computed once when they
+    are added, so averages are O(1) to read and cohort queries only scan flat arrays."""
+
+    def __init__(self):
+        self.names = []
+        self.index = {}
+        self.ages = array('H')
+        self.grade_counts = array('I')
+        self.averages = array('d')
+        # Every grade of every student, in registration order, with each student's start offset.
+        self.grades = array('d')
+        self.grade_offsets = array('Q')
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, age, grades):
+        """Registers a student and returns their row number in the registry. Raises ValueError if a student
+        with the same name is already registered, and leaves the registry unchanged if age or grades cannot
+        be stored."""
+        if name in self.index:
+            raise ValueError(f"a student named {name!r} is already registered")
+        # Convert the age and grades before touching any column, so a bad value cannot leave them uneven.
+        age_value = array('H', [age])
+        grade_values = array('d', grades)
+
+        row = len(self.names)
+        self.names.append(name)
+        self.index[name] = row
+        self.ages.extend(age_value)
+        self.grade_offsets.append(len(self.grades))
+        self.grades.extend(grade_values)
+        self.grade_counts.append(len(grade_values))
+        self.averages.append(sum(grade_values) / len(grade_values) if grade_values else 0.0)
+        return row
+
+    def lookup(self, name):
+        """Returns the Student registered under the name, or None if there is no such student."""
+        row = self.index.get(name)
+        if row is None:
+            return None
+        start = self.grade_offsets[row]
+        grades = list(self.grades[start:start + self.grade_counts[row]])
+        return Student(name, self.ages[row], grades)
+
+    def average(self, name):
+        """Returns the cached average grade of the named student, or None if they have no grades."""
+        row = self.index[name]
+        if not self.grade_counts[row]:
+            return None
+        return self.averages[row]
+
+    def age_band_averages(self, band_width=5):
+        """Returns a dict mapping the first age of each band to the mean average grade of students in it.
+        Students without grades are left out."""
+        totals = {}
+        counts = {}
+        for age, average, count in zip(self.ages, self.averages, self.grade_counts):
+            if count:
+                band = age - age % band_width
+                totals[band] = totals.get(band, 0.0) + average
+                counts[band] = counts.get(band, 0) + 1
+        return {band: totals[band] / counts[band] for band in sorted(totals)}
+
+    def top_students(self, k=10):
+        """Returns (name, average) pairs for the k students with the highest averages."""
+        counts = self.grade_counts
+        rows = heapq.nlargest(k, filter(counts.__getitem__, range(len(self.names))), key=self.averages.__getitem__)
+        return [(self.names[row], self.averages[row]) for row in rows]
+
+    def grade_distribution(self, bin_width=10):
+        """Returns a dict mapping the lower edge of each grade bin to the number of grades in it."""
+        bins = Counter(map(float(bin_width).__rfloordiv__, self.grades))
+        return {int(bin_number) * bin_width: count for bin_number, count in sorted(bins.items())}
+
+
+registry = StudentRegistry()
+
+
 def add_student(name, age, grades):
 
     new_student = Student(name, age, grades)
+    registry.add(name, age, grades)
 
     print("Student has been added.")
 
     return new_student
-    
 
-sample_student = add_student("Rami", 27, [0, 100, 50])
 
-sample_student.info_display()
+def benchmark_registry(student_count=1_000_000):
+    """Times each cohort query on a registry of randomly generated students."""
+    rng = random.Random(0)
+    cohort = StudentRegistry()
+    for i in range(student_count):
+        cohort.add(f"Student {i}", rng.randint(17, 40), [rng.randint(0, 100) for _ in range(3)])
+
+    for label, query in (("age band averages", cohort.age_band_averages),
+                         ("top 10 students", cohort.top_students),
+                         ("grade distribution", cohort.grade_distribution)):
+        start = time.perf_counter()
+        query()
+        print(f"{label}: {time.perf_counter() - start:.3f}s for {student_count} students")
+
+
+if __name__ == "__main__":
+    sample_student = add_student("Rami", 27, [0, 100, 50])
+
+    sample_student.info_display()
 
+    if "--benchmark" in sys.argv:
+        benchmark_registry()
@@ -0,0 +1,108 @@
+import csv
+import datetime
+import itertools
+import operator
+from array import array
+from collections import Counter
+
+
+def _date_number(date):
+    """Returns a date as the integer YYYYMMDD. date may be a datetime.date or an ISO "YYYY-MM-DD" string.
+    Raises ValueError for a string that is not a valid, zero-padded YYYY-MM-DD date."""
+    if isinstance(date, str):
+        if len(date) != 10 or date[4] != "-" or date[7] != "-":
+            raise ValueError(f"invalid date, expected YYYY-MM-DD: {date!r}")
+        # fromisoformat checks the fields are digits and that the month and day exist.
+        try:
+            date = datetime.date.fromisoformat(date)
+        except ValueError as e:
+            raise ValueError(f"invalid date {date!r}: {e}") from None
+    elif not isinstance(date, datetime.date):
+        raise TypeError(f"expected a date or an ISO date string, not {date!r}")
+    return date.year * 10000 + date.month * 100 + date.day
+
+
+def _future_birth_date(birth_number, reference_number):
+    """Returns the ValueError for a birth date, given as YYYYMMDD, that is after the reference date."""
+    birth, reference = (f"{number // 10000:04}-{number // 100 % 100:02}-{number % 100:02}"
+                        for number in (birth_number, reference_number))
+    return ValueError(f"birth date {birth} is after the reference date {reference}")
+
+
+def age(birth_date, reference_date=None):
+    """Returns a person's age in whole years on reference_date, which defaults to today. The age only goes up
+    once the month and day of the birthday have been reached. Raises ValueError if the person was born after
+    reference_date."""
+    if reference_date is None:
+        reference_date = datetime.date.today()
+    birth_number = _date_number(birth_date)
+    reference_number = _date_number(reference_date)
+    if birth_number > reference_number:
+        raise _future_birth_date(birth_number, reference_number)
+    return (reference_number - birth_number) // 10000
+
+
+def ages(birth_dates, reference_date=None):
+    """Returns an array with the age in whole years of each birth date on reference_date. Birth dates may be
+    datetime.date objects or ISO "YYYY-MM-DD" strings, mixed in any order, and ValueError is raised for an
+    invalid one or one after reference_date. Writing both dates as YYYYMMDD integers means the difference
+    divided by 10000 is the exact age, so no per-record date arithmetic is needed."""
+    if reference_date is None:
+        reference_date = datetime.date.today()
+    reference_number = _date_number(reference_date)
+    numbers = array('l', map(_date_number, birth_dates))
+    if numbers and max(numbers) > reference_number:
+        raise _future_birth_date(max(numbers), reference_number)
+    return array('l', map((10000).__rfloordiv__, map(reference_number.__sub__, numbers)))
+
+
+def age_bands(age_values, band_width=10):
+    """Returns a Counter mapping the first age of each band to how many of the ages fall in it."""
+    bands = Counter(map(band_width.__rfloordiv__, age_values))
+    return Counter({band * band_width: count for band, count in bands.items()})
+
+
+def _first_bad_row(rows, position, reference_date):
+    """Returns the 1-based number of the first row in rows whose date of birth is invalid or after
+    reference_date."""
+    for number, row in enumerate(rows, 1):
+        try:
+            age(row[position], reference_date)
+        except ValueError:
+            return number
+    return 0
+
+
+def ages_from_csv(input_stream, column="date_of_birth", reference_date=None, band_width=10,
+                  output_stream=None, chunk_size=100_000):
+    """Streams a CSV file with a header row and an ISO date of birth column, chunk_size rows at a time.
+    Returns a Counter of age bands built on the same pass. When output_stream is given, each row is written
+    to it with an "age" column appended. Raises ValueError, naming the data row, for a date of birth that is
+    invalid or after reference_date."""
+    reader = csv.reader(input_stream)
+    header = next(reader)
+    if column not in header:
+        raise ValueError(f"column missing from CSV: {column}")
+    position = header.index(column)
+
+    writer = None
+    if output_stream is not None:
+        writer = csv.writer(output_stream)
+        writer.writerow(header + ["age"])
+
+    histogram = Counter()
+    rows_read = 0
+    while True:
+        rows = list(itertools.islice(reader, chunk_size))
+        if not rows:
+            break
+        try:
+            chunk_ages = ages(map(operator.itemgetter(position), rows), reference_date)
+        except ValueError as e:
+            bad_row = rows_read + _first_bad_row(rows, position, reference_date)
+            raise ValueError(f"bad {column} in row {bad_row}: {e}") from e
+        rows_read += len(rows)
+        histogram.update(age_bands(chunk_ages, band_width))
+        if writer is not None:
+            writer.writerows(row + [chunk_age] for row, chunk_age in zip(rows, chunk_ages))
+    return histogram
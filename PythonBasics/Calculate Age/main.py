@@ -1,7 +1,9 @@
-start_year = int(input("Enter your year of birth: "))
+import datetime
 
-end_year = int(input("Enter the current year: "))
+from ages import age
 
-age = end_year - start_year
+birth_date = datetime.date.fromisoformat(input("Enter your date of birth (YYYY-MM-DD): "))
 
-print(age)
\ No newline at end of file
+reference_date = datetime.date.fromisoformat(input("Enter the current date (YYYY-MM-DD): "))
+
+print(age(birth_date, reference_date))
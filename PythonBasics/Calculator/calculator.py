@@ -0,0 +1,142 @@
+import ast
+import csv
+import functools
+import itertools
+import math
+import operator
+from array import array
+
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Name, ast.Load, ast.Constant,
+                  ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub)
+
+
+def _divide(a, b):
+    """Returns a / b, or NaN when b is zero."""
+    return a / b if b else math.nan
+
+
+def _floor_divide(a, b):
+    """Returns a // b, or NaN when b is zero."""
+    return a // b if b else math.nan
+
+
+def _modulo(a, b):
+    """Returns a % b, or NaN when b is zero."""
+    return a % b if b else math.nan
+
+
+def _power(a, b):
+    """Returns a ** b, or NaN when it would divide by zero, as with 0 ** -1, overflow, as with 10.0 ** 400,
+    or have no real value, as with (-8.0) ** 0.5."""
+    try:
+        result = a ** b
+    except (ZeroDivisionError, OverflowError):
+        return math.nan
+    if isinstance(result, complex):
+        return math.nan
+    return result
+
+
+_CHECKED_OPERATIONS = {ast.Div: "_divide", ast.FloorDiv: "_floor_divide", ast.Mod: "_modulo", ast.Pow: "_power"}
+_CHECKED_FUNCTIONS = {"_divide": _divide, "_floor_divide": _floor_divide, "_modulo": _modulo, "_power": _power}
+
+
+class _CheckDivisions(ast.NodeTransformer):
+    """Rewrites operations that can divide by zero or overflow into calls that return NaN instead of raising."""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        name = _CHECKED_OPERATIONS.get(type(node.op))
+        if name is None:
+            return node
+        return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+
+
+class Formula:
+    """An arithmetic expression parsed and compiled once, which can then be evaluated over whole columns."""
+
+    def __init__(self, expression):
+        tree = ast.parse(expression, mode="eval")
+        names = []
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(f"unsupported syntax in formula: {type(node).__name__}")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise ValueError(f"unsupported constant in formula: {node.value!r}")
+            if isinstance(node, ast.Name):
+                if node.id.startswith("_"):
+                    raise ValueError(f"variable names cannot start with an underscore: {node.id}")
+                names.append(node)
+        names.sort(key=lambda name: name.col_offset)
+        self._variables = list(dict.fromkeys(name.id for name in names))
+
+        # Compile the expression into a lambda taking one argument per variable.
+        body = _CheckDivisions().visit(tree).body
+        arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in self._variables],
+                                  kwonlyargs=[], kw_defaults=[], defaults=[])
+        function = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=arguments, body=body)))
+        namespace = {"__builtins__": {}, **_CHECKED_FUNCTIONS}
+        self._expression = expression
+        self._function = eval(compile(function, "<formula>", "eval"), namespace)
+
+    def get_expression(self):
+        """Returns the source text of the formula."""
+        return self._expression
+
+    def get_variables(self):
+        """Returns the names of the formula's variables in the order they first appear."""
+        return list(self._variables)
+
+    def evaluate_row(self, **values):
+        """Returns the value of the formula for one set of variable values."""
+        return self._function(*(values[name] for name in self._variables))
+
+    def _evaluate_checked(self, *values):
+        """Returns the formula's value for one row as a float, or NaN if it is too large for one."""
+        try:
+            return float(self._function(*values))
+        except OverflowError:
+            return math.nan
+
+    def evaluate(self, columns, length=None):
+        """Returns an array with the formula's value for each row of columns, a dict mapping every variable to
+        a sequence of values. Rows that divide by zero, overflow or have no real result give NaN. length is
+        only needed when the formula has no variables."""
+        if not self._variables:
+            return array('d', itertools.repeat(self._evaluate_checked(), length or 0))
+        column_values = [columns[name] for name in self._variables]
+        try:
+            return array('d', map(self._function, *column_values))
+        except OverflowError:
+            # Integer results can be too large for a float. Evaluate again, checking each row on its own.
+            return array('d', map(self._evaluate_checked, *column_values))
+
+
+@functools.lru_cache(maxsize=128)
+def compile_formula(expression):
+    """Returns the compiled Formula for expression, reusing it if the same expression was compiled before."""
+    return Formula(expression)
+
+
+def evaluate_csv(expression, input_stream, output_stream, result_column="result", chunk_size=100_000):
+    """Streams rows from a CSV file with a header row, and writes each row with the formula's value appended
+    as result_column. Rows are evaluated chunk_size at a time, so memory use does not grow with the file."""
+    formula = compile_formula(expression)
+    reader = csv.reader(input_stream)
+    writer = csv.writer(output_stream)
+
+    header = next(reader)
+    missing = [name for name in formula.get_variables() if name not in header]
+    if missing:
+        raise ValueError(f"columns missing from CSV: {', '.join(missing)}")
+    positions = [header.index(name) for name in formula.get_variables()]
+    writer.writerow(header + [result_column])
+
+    while True:
+        rows = list(itertools.islice(reader, chunk_size))
+        if not rows:
+            break
+        columns = {name: list(map(float, map(operator.itemgetter(position), rows)))
+                   for name, position in zip(formula.get_variables(), positions)}
+        results = formula.evaluate(columns, len(rows))
+        writer.writerows(row + [result] for row, result in zip(rows, results))
@@ -4,9 +4,13 @@ second_number = int(input("Enter another number: "))
 sum = first_number + second_number
 subtraction = first_number - second_number
 multiplication = first_number * second_number
-division = first_number / second_number
 
 print(sum)
 print(subtraction)
 print(multiplication)
-print(division)
+
+if second_number == 0:
+    print("Cannot divide by zero.")
+else:
+    division = first_number / second_number
+    print(division)
@@ -0,0 +1,96 @@
+import math
+import operator
+import time
+from array import array
+
+TWO_PI = 2 * math.pi
+
+# Number of float64 values read from a file at a time, 8MB per chunk.
+CHUNK_SIZE = 1 << 20
+
+
+def _as_array(radii):
+    """Returns radii as a float64 array, without copying if it already is one."""
+    if isinstance(radii, array) and radii.typecode == 'd':
+        return radii
+    return array('d', radii)
+
+
+def _squares(radii):
+    """Returns an iterator over the square of each radius."""
+    return map(operator.mul, radii, radii)
+
+
+def diameters(radii):
+    """Returns an array with the diameter of a circle of each radius."""
+    return array('d', map((2.0).__mul__, _as_array(radii)))
+
+
+def circumferences(radii):
+    """Returns an array with the circumference, 2 * pi * r, of a circle of each radius."""
+    return array('d', map(TWO_PI.__mul__, _as_array(radii)))
+
+
+def areas(radii):
+    """Returns an array with the area, pi * r^2, of a circle of each radius."""
+    return array('d', map(math.pi.__mul__, _squares(_as_array(radii))))
+
+
+def sphere_surface_areas(radii):
+    """Returns an array with the surface area, 4 * pi * r^2, of a sphere of each radius."""
+    return array('d', map((4 * math.pi).__mul__, _squares(_as_array(radii))))
+
+
+def sphere_volumes(radii):
+    """Returns an array with the volume, 4/3 * pi * r^3, of a sphere of each radius."""
+    radii = _as_array(radii)
+    return array('d', map((4 / 3 * math.pi).__mul__, map(operator.mul, _squares(radii), radii)))
+
+
+QUANTITIES = {
+    "diameter": diameters,
+    "circumference": circumferences,
+    "area": areas,
+    "sphere_surface_area": sphere_surface_areas,
+    "sphere_volume": sphere_volumes,
+}
+
+
+def process_radius_file(radius_path, output_paths, chunk_size=CHUNK_SIZE):
+    """Reads raw float64 radii from radius_path and writes each requested quantity as raw float64 values to
+    its own file. output_paths maps names from QUANTITIES to file paths. The file is processed chunk_size
+    radii at a time, so memory use stays the same however many shapes there are. Returns the number of radii."""
+    outputs = {}
+    count = 0
+    try:
+        for name, path in output_paths.items():
+            if name not in QUANTITIES:
+                raise ValueError(f"unknown quantity: {name}")
+            outputs[name] = open(path, 'wb')
+
+        with open(radius_path, 'rb') as radius_file:
+            while True:
+                radii = array('d')
+                radii.frombytes(radius_file.read(chunk_size * radii.itemsize))
+                if not radii:
+                    break
+                count += len(radii)
+                for name, output in outputs.items():
+                    QUANTITIES[name](radii).tofile(output)
+    finally:
+        for output in outputs.values():
+            output.close()
+    return count
+
+
+def main(count=10 ** 6):
+    """Times the circumference and area of count circles."""
+    radii = array('d', range(count))
+    start = time.perf_counter()
+    circumferences(radii)
+    areas(radii)
+    print(f"Circumference and area of {count} circles took {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
-radius = int(input("Enter the radius: "))
+import math
 
-circumference = 2 * 3.142 * radius
-area = (3.142 * radius) ** 2
+radius = float(input("Enter the radius: "))
+
+circumference = 2 * math.pi * radius
+area = math.pi * radius ** 2
 
 print(circumference)
-print(area)
\ No newline at end of file
+print(area)
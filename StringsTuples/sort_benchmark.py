@@ -0,0 +1,79 @@
+import os
+import random
+import sys
+import time
+from array import array
+
+from sorting import bubble_sort, insertion_sort, merge_sort, parallel_sort
+
+
+def make_inputs(size, rng):
+    """Returns the input shapes to benchmark, keyed by name."""
+    random_values = [rng.random() for _ in range(size)]
+    return {
+        "random": random_values,
+        "sorted": sorted(random_values),
+        "reversed": sorted(random_values, reverse=True),
+        "duplicates": [rng.randint(0, 9) for _ in range(size)],
+    }
+
+
+def time_sort(sort, values, repeats):
+    """Returns the best time out of repeats for sorting a fresh copy of values."""
+    best = float("inf")
+    for _ in range(repeats):
+        data = list(values)
+        start = time.perf_counter()
+        result = sort(data)
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        if (result if result is not None else data) != sorted(values):
+            raise AssertionError(f"{sort.__name__} returned an unsorted list")
+    return best
+
+
+def main(sizes=(100, 1_000, 10_000, 100_000), quadratic_limit=2_000, repeats=3):
+    """Prints how long each sort takes for every size and input shape. Bubble and insertion sort are skipped
+    above quadratic_limit items, except on sorted input where they finish in linear time."""
+    rng = random.Random(0)
+    sorts = [("sorted", sorted), ("merge_sort", merge_sort),
+             ("insertion_sort", insertion_sort), ("bubble_sort", bubble_sort)]
+
+    print(f"{'size':>8} {'shape':<11}" + "".join(f"{name:>16}" for name, _ in sorts))
+    for size in sizes:
+        for shape, values in make_inputs(size, rng).items():
+            row = f"{size:>8} {shape:<11}"
+            for name, sort in sorts:
+                quadratic = sort in (insertion_sort, bubble_sort)
+                if quadratic and size > quadratic_limit and shape != "sorted":
+                    row += f"{'-':>16}"
+                    continue
+                row += f"{time_sort(sort, values, repeats) * 1000:>14.3f}ms"
+            print(row)
+
+
+def parallel_main(sizes=(10_000_000, 100_000_000), merge_sort_limit=10_000_000):
+    """Prints the speedup of parallel_sort over single-core merge_sort and sorted for large random inputs.
+    merge_sort is skipped above merge_sort_limit items because it takes minutes at that size."""
+    rng = random.Random(0)
+    print(f"Using {os.cpu_count()} cores")
+    for size in sizes:
+        values = array('d', (rng.random() for _ in range(size)))
+        timings = {}
+        for name, sort in (("sorted", sorted), ("merge_sort", merge_sort), ("parallel_sort", parallel_sort)):
+            if sort is merge_sort and size > merge_sort_limit:
+                continue
+            start = time.perf_counter()
+            sort(values)
+            timings[name] = time.perf_counter() - start
+
+        parallel = timings["parallel_sort"]
+        for name, elapsed in timings.items():
+            print(f"{size:>11} {name:<14}{elapsed:>9.2f}s  parallel_sort speedup {elapsed / parallel:.2f}x")
+
+
+if __name__ == '__main__':
+    if "--parallel" in sys.argv:
+        parallel_main()
+    else:
+        main()
@@ -0,0 +1,326 @@
+import heapq
+import itertools
+import operator
+import os
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.sharedctypes import RawArray
+
+
+def _less_than(reverse):
+    """Returns the comparison that decides whether one key belongs before another."""
+    return operator.gt if reverse else operator.lt
+
+
+def _keys_for(arr, key):
+    """Returns the list of keys to compare, or arr itself when no key function is given."""
+    if key is None:
+        return arr
+    return [key(item) for item in arr]
+
+
+def bubble_sort(arr, key=None, reverse=False):
+    """Sorts arr in place. Stops as soon as a pass makes no swaps, so already sorted input takes one pass."""
+    keys = _keys_for(arr, key)
+    before = _less_than(reverse)
+    n = len(arr)
+
+    for i in range(n):
+        swapped = False
+        for j in range(0, n - i - 1):
+            if before(keys[j + 1], keys[j]):
+                arr[j], arr[j + 1] = arr[j + 1], arr[j]
+                if keys is not arr:
+                    keys[j], keys[j + 1] = keys[j + 1], keys[j]
+                swapped = True
+        if not swapped:
+            break
+
+
+def _insertion_sort_range(keys, values, start, end, before):
+    """Insertion sorts keys[start:end] in place, moving values alongside when they are a separate list."""
+    for x in range(start + 1, end):
+        current_key = keys[x]
+        if values is not None:
+            current_value = values[x]
+        y = x - 1
+
+        while y >= start and before(current_key, keys[y]):
+            keys[y + 1] = keys[y]
+            if values is not None:
+                values[y + 1] = values[y]
+            y -= 1
+
+        keys[y + 1] = current_key
+        if values is not None:
+            values[y + 1] = current_value
+
+
+def insertion_sort(arr, key=None, reverse=False):
+    """Sorts arr in place."""
+    keys = _keys_for(arr, key)
+    _insertion_sort_range(keys, None if keys is arr else arr, 0, len(arr), _less_than(reverse))
+
+
+def _merge(src_keys, src_values, dst_keys, dst_values, lo, mid, hi, before):
+    """Merges the sorted runs src[lo:mid] and src[mid:hi] into dst[lo:hi]."""
+    # The runs are already in order, so copy them across without comparing.
+    if not before(src_keys[mid], src_keys[mid - 1]):
+        dst_keys[lo:hi] = src_keys[lo:hi]
+        if src_values is not None:
+            dst_values[lo:hi] = src_values[lo:hi]
+        return
+
+    x, y = lo, mid
+    out = lo
+    while x < mid and y < hi:
+        if before(src_keys[y], src_keys[x]):
+            dst_keys[out] = src_keys[y]
+            if src_values is not None:
+                dst_values[out] = src_values[y]
+            y += 1
+        else:
+            dst_keys[out] = src_keys[x]
+            if src_values is not None:
+                dst_values[out] = src_values[x]
+            x += 1
+        out += 1
+
+    # Only one of the runs has anything left in it.
+    if x < mid:
+        dst_keys[out:hi] = src_keys[x:mid]
+        if src_values is not None:
+            dst_values[out:hi] = src_values[x:mid]
+    else:
+        dst_keys[out:hi] = src_keys[y:hi]
+        if src_values is not None:
+            dst_values[out:hi] = src_values[y:hi]
+
+
+def merge_sort(arr, key=None, reverse=False, cutoff=32):
+    """Returns a new sorted list. Runs of up to cutoff items are insertion sorted first, then runs are merged
+    bottom-up, moving back and forth between the list and a single buffer instead of slicing at every level."""
+    values = list(arr)
+    n = len(values)
+    if n <= 1:
+        return values
+
+    keys = values if key is None else [key(item) for item in values]
+    if keys is values:
+        values = None
+    before = _less_than(reverse)
+
+    for start in range(0, n, cutoff):
+        _insertion_sort_range(keys, values, start, min(start + cutoff, n), before)
+
+    src_keys, src_values = keys, values
+    dst_keys = [None] * n
+    dst_values = None if values is None else [None] * n
+
+    width = cutoff
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid = min(lo + width, n)
+            hi = min(lo + 2 * width, n)
+            if mid < hi:
+                _merge(src_keys, src_values, dst_keys, dst_values, lo, mid, hi, before)
+            else:
+                dst_keys[lo:hi] = src_keys[lo:hi]
+                if src_values is not None:
+                    dst_values[lo:hi] = src_values[lo:hi]
+        src_keys, dst_keys = dst_keys, src_keys
+        src_values, dst_values = dst_values, src_values
+        width *= 2
+
+    return src_keys if src_values is None else src_values
+
+
+def merge(first_half, second_half, key=None, reverse=False):
+    """Merges two sorted lists into a new sorted list."""
+    combined = list(first_half) + list(second_half)
+    keys = combined if key is None else [key(item) for item in combined]
+    values = None if keys is combined else combined
+    mid = len(first_half)
+    if mid == 0 or mid == len(combined):
+        return combined
+
+    dst_keys = [None] * len(combined)
+    dst_values = None if values is None else [None] * len(combined)
+    _merge(keys, values, dst_keys, dst_values, 0, mid, len(combined), _less_than(reverse))
+    return dst_keys if dst_values is None else dst_values
+
+
+def _spill_run(lines, directory):
+    """Writes a sorted run of lines to a new temporary file in directory and returns its path."""
+    with tempfile.NamedTemporaryFile('w', dir=directory, delete=False, suffix=".run") as run:
+        run.writelines(lines)
+    return run.name
+
+
+def _merge_files(paths, output, key, reverse):
+    """Streams a k-way heap merge of the sorted run files into the output stream."""
+    runs = [open(path) for path in paths]
+    try:
+        output.writelines(heapq.merge(*runs, key=key, reverse=reverse))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def external_sort(input_file, output_file, key=None, reverse=False, run_size=100_000, max_open_runs=64,
+                  temp_dir=None):
+    """Sorts the lines of input_file into output_file without holding more than run_size lines in memory.
+    The input is sorted in runs of run_size lines that are spilled to temporary files, then the runs are
+    merged with a k-way heap merge. When there are more than max_open_runs runs they are merged in several
+    passes so the number of open files stays bounded. Both arguments may be paths or open text streams, and
+    key is applied to each line including its newline. The runs are written under temp_dir, which defaults to
+    the system temporary directory; point it at a disk when that is a RAM-backed tmpfs."""
+    input_stream = open(input_file) if isinstance(input_file, (str, os.PathLike)) else input_file
+    output_stream = open(output_file, 'w') if isinstance(output_file, (str, os.PathLike)) else output_file
+
+    try:
+        with tempfile.TemporaryDirectory(dir=temp_dir) as directory:
+            paths = []
+            while True:
+                lines = list(itertools.islice(input_stream, run_size))
+                if not lines:
+                    break
+                # A final line without a newline would otherwise run into the next line when merged.
+                if not lines[-1].endswith("\n"):
+                    lines[-1] += "\n"
+                lines.sort(key=key, reverse=reverse)
+                paths.append(_spill_run(lines, directory))
+
+            while len(paths) > max_open_runs:
+                merged = []
+                for start in range(0, len(paths), max_open_runs):
+                    group = paths[start:start + max_open_runs]
+                    with tempfile.NamedTemporaryFile('w', dir=directory, delete=False, suffix=".run") as run:
+                        _merge_files(group, run, key, reverse)
+                    for path in group:
+                        os.remove(path)
+                    merged.append(run.name)
+                paths = merged
+
+            _merge_files(paths, output_stream, key, reverse)
+    finally:
+        if input_stream is not input_file:
+            input_stream.close()
+        if output_stream is not output_file:
+            output_stream.close()
+
+
+# Most items a worker turns into Python objects at once, whether sorting a run or merging a block. This keeps
+# each worker's memory use bounded however large the input is.
+PARALLEL_BLOCK_SIZE = 1 << 20
+
+# The two shared buffers worker processes sort and merge between, set by the pool initializer.
+_shared_buffers = None
+
+
+def _use_shared_buffers(buffers):
+    """Pool initializer that hands the shared buffers to a worker process when it starts."""
+    global _shared_buffers
+    _shared_buffers = buffers
+
+
+def _shared_view(index, typecode):
+    """Returns a typed memoryview of one of the shared buffers."""
+    return memoryview(_shared_buffers[index]).cast('B').cast(typecode)
+
+
+def _sort_shared_run(typecode, lo, hi):
+    """Sorts items lo to hi of the first shared buffer in place."""
+    with _shared_view(0, typecode) as view:
+        view[lo:hi] = array(typecode, sorted(view[lo:hi]))
+
+
+def _co_rank(view, lo, mid, hi, k):
+    """Returns how many of the first k items of the merge of the sorted runs view[lo:mid] and view[mid:hi]
+    come from the first run, using a binary search. Ties are taken from the first run."""
+    first_length = mid - lo
+    low = max(0, k - (hi - mid))
+    high = min(k, first_length)
+    while low < high:
+        i = (low + high) // 2
+        j = k - i
+        if view[lo + i] <= view[mid + j - 1]:
+            low = i + 1
+        else:
+            high = i
+    return low
+
+
+def _merge_shared_block(typecode, source, lo, mid, hi, start, end):
+    """Writes items start to end of the merge of the sorted runs lo:mid and mid:hi of one shared buffer into
+    positions lo + start to lo + end of the other buffer. The pieces of each run that belong in the block are
+    found by binary search, so blocks of the same merge can be written by different workers at once."""
+    with _shared_view(source, typecode) as src, _shared_view(1 - source, typecode) as dst:
+        i0 = _co_rank(src, lo, mid, hi, start)
+        i1 = _co_rank(src, lo, mid, hi, end)
+        first = src[lo + i0:lo + i1]
+        second = src[mid + start - i0:mid + end - i1]
+        # sorted() finds the two runs and merges them in linear time.
+        dst[lo + start:lo + end] = array(typecode, sorted(itertools.chain(first, second)))
+        first.release()
+        second.release()
+
+
+def _copy_shared_block(typecode, source, lo, hi):
+    """Copies items lo to hi from one shared buffer to the other."""
+    with _shared_view(source, typecode) as src, _shared_view(1 - source, typecode) as dst:
+        dst[lo:hi] = src[lo:hi]
+
+
+def parallel_sort(values, typecode='d', workers=None, block_size=None):
+    """Returns an array of the numeric values sorted using a pool of worker processes. The values are copied
+    once into one of two shared memory buffers. Workers sort runs of at most block_size items, then the runs
+    are merged pairwise in rounds that move the data from one buffer to the other. Each merge is split into
+    blocks of at most block_size items that are written by different workers, so every round, including the
+    last, uses every core and no worker holds more than one block. Workers only receive offsets into the
+    buffers, so the data itself is never pickled."""
+    data = array(typecode, values)
+    n = len(data)
+    if n <= 1:
+        return data
+
+    workers = workers or os.cpu_count() or 1
+    block_size = block_size or PARALLEL_BLOCK_SIZE
+    run_count = max(workers, -(-n // block_size))
+    runs = [(n * i // run_count, n * (i + 1) // run_count) for i in range(run_count)]
+
+    buffers = (RawArray('b', n * data.itemsize), RawArray('b', n * data.itemsize))
+    with memoryview(buffers[0]).cast('B').cast(typecode) as view:
+        view[:] = data
+
+    source = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_use_shared_buffers, initargs=(buffers,)) as pool:
+        for future in [pool.submit(_sort_shared_run, typecode, lo, hi) for lo, hi in runs if hi > lo]:
+            future.result()
+
+        while len(runs) > 1:
+            futures = []
+            merged = []
+            for pair in range(0, len(runs), 2):
+                if pair + 1 == len(runs):
+                    lo, hi = runs[pair]
+                    futures.append(pool.submit(_copy_shared_block, typecode, source, lo, hi))
+                    merged.append((lo, hi))
+                    continue
+                lo, mid = runs[pair]
+                hi = runs[pair + 1][1]
+                # Split the merge into enough blocks to keep every worker busy and each block small.
+                block_count = max(-(-(hi - lo) // block_size), -(-workers * 2 // len(runs)))
+                bounds = [(hi - lo) * b // block_count for b in range(block_count + 1)]
+                for start, end in zip(bounds, bounds[1:]):
+                    if end > start:
+                        futures.append(pool.submit(_merge_shared_block, typecode, source, lo, mid, hi, start, end))
+                merged.append((lo, hi))
+            for future in futures:
+                future.result()
+            runs = merged
+            source = 1 - source
+
+    with memoryview(buffers[source]).cast('B').cast(typecode) as view:
+        return array(typecode, view)